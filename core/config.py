@@ -9,6 +9,7 @@ class Settings(BaseSettings):
     ssh_port: int
     ssh_username: str
     ssh_password: str
+    ssh_use_agent: bool = False
 
     openai_api_key: str
     openai_model: str
@@ -23,3 +23,9 @@ class StepHistory(BaseModel):
     # 명령 이벤트일 때만 아래 필드 사용
     command: str | None = None
     output: str | None = None
+
+    # 에이전트 모드로 실행된 명령일 때만 아래 필드 사용
+    stderr: str | None = None
+    exit_code: int | None = None
+    duration: float | None = None
+    resource_usage: dict | None = None
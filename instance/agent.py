@@ -0,0 +1,183 @@
+import codecs
+import json
+import socket
+import struct
+import time
+from pathlib import Path
+from typing import Callable
+
+from pydantic import BaseModel, Field
+
+# 원격 에이전트(agent_shim.py)와 프레임 프로토콜로 통신하는 세션
+# PTY 셸과 달리 프롬프트/에코 추정 없이 stdout, stderr, 종료 코드를 그대로 받음
+
+SHIM_PATH = Path(__file__).with_name("agent_shim.py")
+REMOTE_SHIM_PATH = ".rootllm_agent.py"
+
+HEADER = struct.Struct("!cI")
+CHUNK_SIZE = 65536
+PROTOCOL_VERSION = 1
+
+# 원격 측이 타임아웃을 처리하지 못했을 때 클라이언트가 추가로 기다리는 시간
+DEADLINE_MARGIN_SECONDS = 10
+
+
+class AgentError(Exception):
+    pass
+
+
+class CommandResult(BaseModel):
+    stdout: str = Field("")
+    stderr: str = Field("")
+    exit_code: int = Field(...)
+    duration: float = Field(..., description="원격 측 실행 시간 (초 단위)")
+    timed_out: bool = Field(False)
+    interrupted: bool = Field(False)
+    state_saved: bool = Field(True, description="작업 디렉토리/환경 변수 저장 여부")
+    resource_usage: dict = Field(default_factory=dict)
+
+
+class AgentSession:
+    def __init__(self, ssh_client, password: str = ""):
+        self.ssh_client = ssh_client
+        self.password = password
+        self.channel = None
+        self.buffer = b""
+        # 원격 에이전트의 상태 파일 경로 (PTY 셸 동기화에 사용)
+        self.cwd_file = None
+        self.env_file = None
+
+    def is_running(self) -> bool:
+        return self.channel is not None and not self.channel.closed
+
+    def start(self, timeout: int = 10):
+        """에이전트를 업로드하고 exec 채널에서 실행한 뒤 준비 응답을 기다림"""
+        sftp = self.ssh_client.open_sftp()
+        try:
+            sftp.put(str(SHIM_PATH), REMOTE_SHIM_PATH)
+            sftp.chmod(REMOTE_SHIM_PATH, 0o600)
+        finally:
+            sftp.close()
+
+        self.channel = self.ssh_client.get_transport().open_session()
+        self.channel.settimeout(0.1)
+        self.channel.exec_command(f"python3 -u {REMOTE_SHIM_PATH}")
+
+        self._send_json(b"H", {"password": self.password})
+        frame_type, payload = self._read_frame(time.time() + timeout)
+        if frame_type != b"R":
+            raise AgentError(f"Unexpected agent handshake: {payload!r}")
+        ready = json.loads(payload)
+        if ready.get("version") != PROTOCOL_VERSION:
+            raise AgentError(f"Unsupported agent version: {ready.get('version')}")
+        self.cwd_file = ready["cwd_file"]
+        self.env_file = ready["env_file"]
+        return ready
+
+    def run(
+        self,
+        command: str,
+        timeout: int | None = 30,
+        on_output: Callable[[str, str], None] | None = None,
+    ) -> CommandResult:
+        """
+        명령 실행 후 결과 반환
+
+        timeout: None 또는 0 이하이면 시간 제한 없음 (에이전트와 동일한 규칙)
+        on_output: 출력이 도착할 때마다 ("stdout" | "stderr", text)로 호출
+        """
+        if not self.is_running():
+            raise AgentError("Agent is not running")
+
+        self._send_json(b"C", {"command": command, "timeout": timeout})
+
+        streams = {b"O": "stdout", b"E": "stderr"}
+        decoders = {
+            name: codecs.getincrementaldecoder("utf-8")(errors="replace")
+            for name in streams.values()
+        }
+        output = {name: [] for name in streams.values()}
+
+        if timeout is not None and timeout > 0:
+            deadline = time.time() + timeout + DEADLINE_MARGIN_SECONDS
+        else:
+            deadline = None
+        interrupt_sent = False
+        while True:
+            try:
+                frame_type, payload = self._read_frame(deadline)
+            except TimeoutError:
+                if interrupt_sent:
+                    raise AgentError("Agent did not respond to interrupt")
+                self.interrupt()
+                interrupt_sent = True
+                deadline = time.time() + DEADLINE_MARGIN_SECONDS
+                continue
+
+            if frame_type in streams:
+                name = streams[frame_type]
+                text = decoders[name].decode(payload)
+                output[name].append(text)
+                if on_output is not None and text:
+                    on_output(name, text)
+            elif frame_type == b"X":
+                for name, decoder in decoders.items():
+                    output[name].append(decoder.decode(b"", final=True))
+                status = json.loads(payload)
+                return CommandResult(
+                    stdout="".join(output["stdout"]),
+                    stderr="".join(output["stderr"]),
+                    **status,
+                )
+            elif frame_type == b"F":
+                raise AgentError(json.loads(payload).get("error", "Agent failure"))
+            else:
+                raise AgentError(f"Unknown agent frame type {frame_type!r}")
+
+    def interrupt(self):
+        """실행 중인 명령에 SIGINT 전송 (Ctrl+C)"""
+        if self.is_running():
+            self._send_frame(b"K")
+
+    def close(self):
+        if self.channel is not None:
+            try:
+                if not self.channel.closed:
+                    self._send_frame(b"Q")
+            except (OSError, EOFError):
+                pass
+            self.channel.close()
+            self.channel = None
+        self.buffer = b""
+
+    def _send_frame(self, frame_type: bytes, payload: bytes = b""):
+        self.channel.sendall(HEADER.pack(frame_type, len(payload)) + payload)
+
+    def _send_json(self, frame_type: bytes, obj: dict):
+        self._send_frame(frame_type, json.dumps(obj).encode("utf-8"))
+
+    def _read_frame(self, deadline: float | None) -> tuple[bytes, bytes]:
+        while True:
+            if len(self.buffer) >= HEADER.size:
+                frame_type, length = HEADER.unpack_from(self.buffer)
+                end = HEADER.size + length
+                if len(self.buffer) >= end:
+                    payload = self.buffer[HEADER.size : end]
+                    self.buffer = self.buffer[end:]
+                    return frame_type, payload
+
+            if deadline is not None and time.time() > deadline:
+                raise TimeoutError("Timed out waiting for agent")
+            try:
+                data = self.channel.recv(CHUNK_SIZE)
+            except socket.timeout:
+                continue
+            if not data:
+                stderr = b""
+                while self.channel.recv_stderr_ready():
+                    stderr += self.channel.recv_stderr(CHUNK_SIZE)
+                raise AgentError(
+                    "Agent channel closed: "
+                    + stderr.decode("utf-8", errors="replace").strip()
+                )
+            self.buffer += data
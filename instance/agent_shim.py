@@ -0,0 +1,384 @@
+"""
+RootLLM 원격 에이전트 (SSHClient가 SFTP로 업로드 후 exec 채널에서 실행)
+
+원격 인스턴스에서 표준 라이브러리만으로 동작해야 하므로 프로젝트 모듈을 임포트하지 않는다.
+
+프레임 형식: [type 1byte][length 4byte big-endian][payload]
+- client -> agent
+    H: hello  {"password": str}
+    C: 명령   {"command": str, "timeout": float | null}  (null 또는 0 이하이면 제한 없음)
+    K: 실행 중인 명령 중단 (Ctrl+C)
+    Q: 종료
+- agent -> client
+    R: 준비 완료 {"version": int, "pid": int, "python": str, "cwd_file": str, "env_file": str}
+    O: stdout 조각 (bytes)
+    E: stderr 조각 (bytes)
+    X: 명령 종료 {"exit_code", "duration", "timed_out", "interrupted", "state_saved",
+                  "resource_usage"}
+    F: 프로토콜 오류 {"error": str}
+"""
+
+import json
+import os
+import select
+import selectors
+import shlex
+import shutil
+import signal
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+VERSION = 1
+HEADER = struct.Struct("!cI")
+CHUNK_SIZE = 65536
+KILL_GRACE_SECONDS = 2.0
+POLL_SECONDS = 0.05
+MIN_EXIT_WAIT_SECONDS = 0.001
+# 종료된 명령의 백그라운드 작업이 아직 쓰고 있는 파이프 표시
+ORPHAN = "orphan"
+
+# bash -c 실행 전에 BASH_ENV로 읽히는 파일
+# - 이전 명령의 작업 디렉토리와 export 변수를 복원 (PTY 셸처럼 상태 유지)
+# - 종료 시 EXIT trap으로 상태 저장, 명령이 EXIT trap을 설정해도 저장이 뒤에 이어지도록 trap을 감쌈
+# - exec 등으로 저장되지 못하면 SAVED 파일이 없으므로 에이전트가 state_saved=false로 알림
+RC_TEMPLATE = """\
+unset BASH_ENV
+[ -f "$ROOTLLM_ENV_FILE" ] && . "$ROOTLLM_ENV_FILE" 2>/dev/null
+cd "$(cat "$ROOTLLM_CWD_FILE" 2>/dev/null || printf '%s' "$HOME")" 2>/dev/null
+__rootllm_save() {
+    pwd > "$ROOTLLM_CWD_FILE"
+    export -p > "$ROOTLLM_ENV_FILE"
+    : > "$ROOTLLM_SAVED_FILE"
+}
+trap() {
+    [ "$1" = "--" ] && shift
+    case "$1" in -l|-p|-lp|-pl) builtin trap "$@"; return ;; esac
+    [ $# -eq 0 ] && { builtin trap; return; }
+    local action=- sig status=0
+    [ $# -gt 1 ] && { action=$1; shift; }
+    for sig in "$@"; do
+        case "$sig" in
+            EXIT|exit|SIGEXIT|0)
+                case "$action" in
+                    ""|-) builtin trap -- __rootllm_save EXIT ;;
+                    *) builtin trap -- "$action"$'\\n'__rootllm_save EXIT ;;
+                esac ;;
+            *) builtin trap -- "$action" "$sig" || status=$? ;;
+        esac
+    done
+    return $status
+}
+builtin trap -- __rootllm_save EXIT
+"""
+SUDO_FUNCTION = 'sudo() { command sudo -A "$@"; }\n'
+
+
+class FrameReader:
+    def __init__(self, fd):
+        self.fd = fd
+        self.buffer = b""
+        self.eof = False
+
+    def feed(self):
+        data = os.read(self.fd, CHUNK_SIZE)
+        if not data:
+            self.eof = True
+        self.buffer += data
+
+    def next_frame(self):
+        if len(self.buffer) < HEADER.size:
+            return None
+        frame_type, length = HEADER.unpack_from(self.buffer)
+        end = HEADER.size + length
+        if len(self.buffer) < end:
+            return None
+        payload = self.buffer[HEADER.size : end]
+        self.buffer = self.buffer[end:]
+        return frame_type, payload
+
+    def read_frame(self):
+        """프레임 하나가 완성될 때까지 블로킹으로 읽음 (EOF면 None)"""
+        while True:
+            frame = self.next_frame()
+            if frame is not None or self.eof:
+                return frame
+            self.feed()
+
+
+def write_frame(frame_type, payload=b""):
+    data = HEADER.pack(frame_type, len(payload)) + payload
+    while data:
+        written = os.write(1, data)
+        data = data[written:]
+
+
+def write_json(frame_type, obj):
+    write_frame(frame_type, json.dumps(obj).encode("utf-8"))
+
+
+def exit_code_from_status(status):
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def rusage_to_dict(rusage):
+    return {
+        "user_time": rusage.ru_utime,
+        "system_time": rusage.ru_stime,
+        "max_rss_kb": rusage.ru_maxrss,
+        "minor_faults": rusage.ru_minflt,
+        "major_faults": rusage.ru_majflt,
+        "block_input": rusage.ru_inblock,
+        "block_output": rusage.ru_oublock,
+        "voluntary_switches": rusage.ru_nvcsw,
+        "involuntary_switches": rusage.ru_nivcsw,
+    }
+
+
+def signal_group(proc, sig):
+    try:
+        os.killpg(proc.pid, sig)
+    except OSError:
+        pass
+
+
+class Agent:
+    def __init__(self, reader):
+        self.reader = reader
+        self.state_dir = tempfile.mkdtemp(prefix="rootllm-agent-")
+        self.env = dict(os.environ)
+        # 명령 종료 후에도 백그라운드 작업이 잡고 있는 stdout/stderr 파이프
+        # 닫으면 작업이 다음 출력에서 SIGPIPE로 죽으므로 EOF까지 읽어서 버림
+        self.orphans = []
+
+    def setup(self, password):
+        rc_path = os.path.join(self.state_dir, "rc.sh")
+        sudo = ""
+        if password:
+            askpass_path = os.path.join(self.state_dir, "askpass.sh")
+            with open(askpass_path, "w") as f:
+                f.write("#!/bin/sh\nprintf '%s\\n' " + shlex.quote(password) + "\n")
+            os.chmod(askpass_path, 0o700)
+            self.env["SUDO_ASKPASS"] = askpass_path
+            sudo = SUDO_FUNCTION
+        with open(rc_path, "w") as f:
+            f.write(RC_TEMPLATE + sudo)
+
+        self.env["BASH_ENV"] = rc_path
+        self.env["ROOTLLM_CWD_FILE"] = os.path.join(self.state_dir, "cwd")
+        self.env["ROOTLLM_ENV_FILE"] = os.path.join(self.state_dir, "env")
+        self.env["ROOTLLM_SAVED_FILE"] = os.path.join(self.state_dir, "saved")
+
+    def cleanup(self):
+        for pipe in self.orphans:
+            pipe.close()
+        self.orphans = []
+        shutil.rmtree(self.state_dir, ignore_errors=True)
+
+    def drain_orphan(self, pipe):
+        """백그라운드 작업 출력을 읽어서 버림 (EOF면 False)"""
+        try:
+            data = os.read(pipe.fileno(), CHUNK_SIZE)
+        except BlockingIOError:
+            return True
+        return bool(data)
+
+    def release_orphan(self, pipe):
+        self.orphans.remove(pipe)
+        pipe.close()
+
+    def next_frame(self):
+        """다음 요청 프레임을 기다리는 동안 백그라운드 작업 출력도 계속 비움"""
+        while True:
+            frame = self.reader.next_frame()
+            if frame is not None or self.reader.eof:
+                return frame
+            if not self.orphans:
+                self.reader.feed()
+                continue
+            readable, _, _ = select.select([self.reader.fd] + self.orphans, [], [])
+            for fileobj in readable:
+                if fileobj == self.reader.fd:
+                    self.reader.feed()
+                elif not self.drain_orphan(fileobj):
+                    self.release_orphan(fileobj)
+
+    def serve(self):
+        hello = self.reader.read_frame()
+        if hello is None or hello[0] != b"H":
+            write_json(b"F", {"error": "expected hello frame"})
+            return
+        self.setup(json.loads(hello[1]).get("password", ""))
+        write_json(
+            b"R",
+            {
+                "version": VERSION,
+                "pid": os.getpid(),
+                "python": sys.version.split()[0],
+                "cwd_file": self.env["ROOTLLM_CWD_FILE"],
+                "env_file": self.env["ROOTLLM_ENV_FILE"],
+            },
+        )
+
+        while True:
+            frame = self.next_frame()
+            if frame is None or frame[0] == b"Q":
+                return
+            frame_type, payload = frame
+            if frame_type == b"C":
+                request = json.loads(payload)
+                self.run(request["command"], request.get("timeout"))
+            elif frame_type == b"K":
+                # 실행 중인 명령이 없을 때 도착한 중단 요청은 무시
+                continue
+            else:
+                write_json(b"F", {"error": f"unknown frame type {frame_type!r}"})
+
+    def run(self, command, timeout):
+        start = time.monotonic()
+        deadline = start + timeout if timeout and timeout > 0 else None
+        try:
+            os.unlink(self.env["ROOTLLM_SAVED_FILE"])
+        except FileNotFoundError:
+            pass
+        try:
+            proc = subprocess.Popen(
+                ["/bin/bash", "-c", command],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                env=self.env,
+                start_new_session=True,
+            )
+        except OSError as e:
+            write_frame(b"E", f"{e}\n".encode("utf-8"))
+            write_json(
+                b"X",
+                {
+                    "exit_code": 127,
+                    "duration": time.monotonic() - start,
+                    "timed_out": False,
+                    "interrupted": False,
+                    "state_saved": False,
+                    "resource_usage": {},
+                },
+            )
+            return
+
+        selector = selectors.DefaultSelector()
+        selector.register(proc.stdout, selectors.EVENT_READ, b"O")
+        selector.register(proc.stderr, selectors.EVENT_READ, b"E")
+        selector.register(self.reader.fd, selectors.EVENT_READ, None)
+        for pipe in self.orphans:
+            selector.register(pipe, selectors.EVENT_READ, ORPHAN)
+        open_pipes = 2
+
+        status = rusage = None
+        timed_out = interrupted = False
+        kill_at = None
+        exit_wait = MIN_EXIT_WAIT_SECONDS
+
+        while status is None:
+            if open_pipes:
+                wait = POLL_SECONDS
+            else:
+                # 출력 파이프가 모두 닫혔으면 대개 종료 직전이므로 짧게 시작해 점점 늘림
+                wait = exit_wait
+                exit_wait = min(exit_wait * 2, POLL_SECONDS)
+            now = time.monotonic()
+            if deadline is not None and not timed_out:
+                wait = max(0.0, min(wait, deadline - now))
+            if kill_at is not None:
+                wait = max(0.0, min(wait, kill_at - now))
+
+            for key, _ in selector.select(wait):
+                if key.data is None:
+                    self.reader.feed()
+                    if self.reader.eof:
+                        # 클라이언트가 사라짐: 명령을 정리하고 종료
+                        signal_group(proc, signal.SIGKILL)
+                        selector.unregister(self.reader.fd)
+                        continue
+                    while True:
+                        frame = self.reader.next_frame()
+                        if frame is None:
+                            break
+                        if frame[0] == b"K" and not interrupted:
+                            interrupted = True
+                            signal_group(proc, signal.SIGINT)
+                            kill_at = time.monotonic() + KILL_GRACE_SECONDS
+                    continue
+                if key.data == ORPHAN:
+                    if not self.drain_orphan(key.fileobj):
+                        selector.unregister(key.fileobj)
+                        self.release_orphan(key.fileobj)
+                    continue
+                data = os.read(key.fileobj.fileno(), CHUNK_SIZE)
+                if data:
+                    write_frame(key.data, data)
+                else:
+                    selector.unregister(key.fileobj)
+                    key.fileobj.close()
+                    open_pipes -= 1
+
+            pid, raw_status, raw_rusage = os.wait4(proc.pid, os.WNOHANG)
+            if pid:
+                status, rusage = raw_status, raw_rusage
+                break
+
+            now = time.monotonic()
+            if deadline is not None and now >= deadline and not timed_out:
+                timed_out = True
+                signal_group(proc, signal.SIGINT)
+                kill_at = now + KILL_GRACE_SECONDS
+            elif kill_at is not None and now >= kill_at:
+                signal_group(proc, signal.SIGKILL)
+                kill_at = None
+
+        # 종료 후 남은 출력 회수 (백그라운드 프로세스가 파이프를 잡고 있어도 기다리지 않음)
+        for key in list(selector.get_map().values()):
+            if key.data not in (b"O", b"E"):
+                continue
+            pipe = key.fileobj
+            os.set_blocking(pipe.fileno(), False)
+            while True:
+                try:
+                    data = os.read(pipe.fileno(), CHUNK_SIZE)
+                except BlockingIOError:
+                    # 백그라운드 작업이 아직 쓰는 중: 이후 출력은 버리되 파이프는 유지
+                    self.orphans.append(pipe)
+                    break
+                if not data:
+                    pipe.close()
+                    break
+                write_frame(key.data, data)
+        selector.close()
+        proc.returncode = exit_code_from_status(status)
+
+        write_json(
+            b"X",
+            {
+                "exit_code": proc.returncode,
+                "duration": time.monotonic() - start,
+                "timed_out": timed_out,
+                "interrupted": interrupted,
+                "state_saved": os.path.exists(self.env["ROOTLLM_SAVED_FILE"]),
+                "resource_usage": rusage_to_dict(rusage),
+            },
+        )
+
+
+def main():
+    agent = Agent(FrameReader(0))
+    try:
+        agent.serve()
+    finally:
+        agent.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,12 @@
 import paramiko
+import os
+import shlex
 from pydantic import BaseModel, Field
 from datetime import datetime
 import time
 
 from core.models import StepHistory, EventType
+from instance.agent import AgentSession, AgentError
 
 # 인스턴스 실행 관리(SSH 연결, 명령 실행)
 
@@ -16,11 +19,14 @@ class SSHInfo(BaseModel):
 
 
 class SSHClient:
-    def __init__(self, instance_id, ssh_info: SSHInfo):
+    def __init__(self, instance_id, ssh_info: SSHInfo, use_agent: bool = False):
         self.instance_id = instance_id
         self.ssh_info = ssh_info
         self.ssh_client = None
         self.shell_channel = None
+        # use_agent: 연결 시 원격 에이전트를 띄워 명령을 PTY 없이 실행
+        self.use_agent = use_agent
+        self.agent = None
 
     def get_history(self, json: bool = False):
         if json:
@@ -57,11 +63,20 @@ class SSHClient:
                 password=self.ssh_info.password,
             )
             self.create_shell()  # 세션 생성
+
+            output = f"Connected to Instance id:{self.instance_id}"
+            if self.use_agent:
+                agent_error = self.start_agent()
+                if agent_error:
+                    output += f" (agent unavailable, using PTY shell: {agent_error})"
+                else:
+                    output += " (agent mode)"
+
             return StepHistory(
                 event=EventType.CONNECT,
                 error="",
                 timestamp=datetime.now(),
-                output=f"Connected to Instance id:{self.instance_id}",
+                output=output,
             )
 
         except paramiko.SSHException as e:
@@ -95,6 +110,7 @@ class SSHClient:
 
     def disconnect(self):
         """EventType.DISCONNECT"""
+        self.stop_agent()
         if self.shell_channel is not None:
             self.close_shell()
         self.ssh_client.close()
@@ -113,6 +129,131 @@ class SSHClient:
         result = self.connect()
         return result
 
+    def start_agent(self) -> str:
+        """
+        원격 에이전트 업로드 및 실행
+
+        returns:
+        - error: 실패 시 오류 메시지 (성공 시 빈 문자열)
+        """
+        self.stop_agent()
+        agent = AgentSession(self.ssh_client, password=self.ssh_info.password)
+        try:
+            agent.start()
+        except Exception as e:
+            agent.close()
+            return f"Failed to start agent: {e}"
+
+        self.agent = agent
+        return ""
+
+    def stop_agent(self):
+        if self.agent is not None:
+            self.agent.close()
+            self.agent = None
+
+    def sync_shell_with_agent(self) -> str:
+        """
+        에이전트 모드에서 바뀐 작업 디렉토리/환경 변수를 PTY 셸에 반영
+
+        returns:
+        - error: 동기화 실패 시 오류 메시지 (성공 또는 동기화할 상태가 없으면 빈 문자열)
+        """
+        if self.agent is None or self.agent.cwd_file is None:
+            return ""
+        cwd_file = shlex.quote(self.agent.cwd_file)
+        env_file = shlex.quote(self.agent.env_file)
+        state_dir = shlex.quote(os.path.dirname(self.agent.cwd_file))
+        # 명령 에코와 구분되도록 표시 문자열을 따옴표로 나눠서 출력
+        output, error = self.send_command_to_shell(
+            f"if [ -d {state_dir} ]; then "
+            f"[ ! -f {env_file} ] || . {env_file} 2>/dev/null; "
+            f'[ ! -f {cwd_file} ] || cd -- "$(cat {cwd_file})" '
+            f'|| echo ROOTLLM_SYNC_"FAILED"; '
+            f'else echo ROOTLLM_SYNC_"FAILED": agent state missing; fi'
+        )
+        if error:
+            return f"Failed to sync PTY shell with agent state: {error}"
+        if "ROOTLLM_SYNC_FAILED" in output:
+            return f"Failed to sync PTY shell with agent state: {output}"
+        return ""
+
+    def execute_command(
+        self, command: str, timeout: int = 30, on_output=None
+    ) -> StepHistory:
+        """
+        EventType.SHELL_COMMAND (에이전트 모드)
+
+        PTY 출력 추정 없이 stdout, stderr, 종료 코드, 실행 시간, 자원 사용량을 기록
+        on_output: 출력이 도착할 때마다 ("stdout" | "stderr", text)로 호출
+        """
+        if self.agent is None:
+            return StepHistory(
+                event=EventType.SHELL_COMMAND,
+                error="Agent not available",
+                timestamp=datetime.now(),
+                command=command,
+            )
+        if timeout <= 0:
+            # 제한 없는 명령은 실험 루프를 멈출 수 있으므로 거부
+            return StepHistory(
+                event=EventType.SHELL_COMMAND,
+                error=f"Invalid timeout {timeout}: must be a positive number of seconds",
+                timestamp=datetime.now(),
+                command=command,
+            )
+
+        try:
+            result = self.agent.run(command, timeout, on_output=on_output)
+        except (AgentError, OSError, EOFError) as e:
+            # 채널이 깨진 에이전트는 버리고 이후 명령은 PTY 셸로 실행
+            # 에이전트가 종료되면 상태 파일이 지워지므로 채널이 살아 있을 때 먼저 동기화
+            if self.agent.is_running():
+                sync_error = self.sync_shell_with_agent()
+            else:
+                sync_error = "agent channel closed"
+            self.stop_agent()
+
+            if sync_error:
+                fallback = (
+                    "Later commands run in the PTY shell without the agent's "
+                    f"cwd and env ({sync_error})"
+                )
+            else:
+                fallback = (
+                    "Later commands run in the PTY shell "
+                    "with the agent's cwd and env carried over"
+                )
+            return StepHistory(
+                event=EventType.SHELL_COMMAND,
+                error=f"Agent command failed: {e}. {fallback}",
+                timestamp=datetime.now(),
+                command=command,
+            )
+
+        if result.timed_out:
+            error = f"Command timed out after {timeout} seconds"
+        elif result.interrupted:
+            error = "Command interrupted"
+        else:
+            error = ""
+        if not result.state_saved:
+            # exec 등으로 종료되어 다음 명령에 cwd/환경 변수가 이어지지 않음
+            state_error = "Shell state (cwd, env) was not saved for the next command"
+            error = f"{error}; {state_error}" if error else state_error
+
+        return StepHistory(
+            event=EventType.SHELL_COMMAND,
+            error=error,
+            timestamp=datetime.now(),
+            command=command,
+            output=result.stdout.strip(),
+            stderr=result.stderr.strip(),
+            exit_code=result.exit_code,
+            duration=result.duration,
+            resource_usage=result.resource_usage,
+        )
+
     def create_shell(self):
         """EventType.SHELL_CREATE"""
         if self.shell_channel is not None:
@@ -0,0 +1,194 @@
+import json
+import os
+import select
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+from instance.agent import HEADER, SHIM_PATH, AgentSession
+
+# SSH 없이 agent_shim.py를 로컬 프로세스로 띄워 파이프로 프레임 프로토콜을 검증
+
+
+class PipeChannel:
+    """paramiko Channel 대신 로컬 에이전트 프로세스의 파이프를 사용하는 채널"""
+
+    def __init__(self):
+        self.proc = subprocess.Popen(
+            [sys.executable, "-u", str(SHIM_PATH)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        self.closed = False
+
+    def sendall(self, data):
+        self.proc.stdin.write(data)
+        self.proc.stdin.flush()
+
+    def recv(self, size):
+        ready, _, _ = select.select([self.proc.stdout], [], [], 0.1)
+        if not ready:
+            raise socket.timeout()
+        return os.read(self.proc.stdout.fileno(), size)
+
+    def recv_stderr_ready(self):
+        return bool(select.select([self.proc.stderr], [], [], 0)[0])
+
+    def recv_stderr(self, size):
+        return os.read(self.proc.stderr.fileno(), size)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.proc.stdin.close()
+
+    def wait_rusage(self):
+        """에이전트 종료를 기다리고 에이전트 프로세스 자원 사용량 반환"""
+        _, _, rusage = os.wait4(self.proc.pid, 0)
+        self.proc.returncode = 0
+        return rusage
+
+
+@pytest.fixture
+def session():
+    agent = AgentSession(None, password="secret")
+    agent.channel = PipeChannel()
+    agent._send_json(b"H", {"password": agent.password})
+    frame_type, payload = agent._read_frame(time.time() + 10)
+    assert frame_type == b"R"
+    ready = json.loads(payload)
+    agent.cwd_file = ready["cwd_file"]
+    agent.env_file = ready["env_file"]
+    yield agent
+    agent.close()
+
+
+def test_handshake_reports_state_files(session):
+    assert os.path.isdir(os.path.dirname(session.cwd_file))
+    assert os.path.dirname(session.cwd_file) == os.path.dirname(session.env_file)
+
+
+def test_exit_code_and_output_streams(session):
+    result = session.run("echo out; echo err >&2; exit 3")
+
+    assert result.stdout == "out\n"
+    assert result.stderr == "err\n"
+    assert result.exit_code == 3
+    assert not result.timed_out
+    assert result.resource_usage["max_rss_kb"] > 0
+
+
+def test_on_output_streams_chunks(session):
+    chunks = []
+    result = session.run(
+        "echo one; sleep 0.2; echo two >&2",
+        on_output=lambda stream, text: chunks.append((stream, text)),
+    )
+
+    assert chunks == [("stdout", "one\n"), ("stderr", "two\n")]
+    assert result.stdout == "one\n"
+
+
+def test_cwd_and_env_persist(session):
+    session.run("cd /tmp; export ROOTLLM_TEST_VAR=kept")
+    result = session.run('pwd; echo "$ROOTLLM_TEST_VAR"')
+
+    assert result.stdout == "/tmp\nkept\n"
+    with open(session.cwd_file) as f:
+        assert f.read().strip() == "/tmp"
+
+
+def test_state_persists_with_user_exit_trap(session):
+    result = session.run("cd /tmp; trap 'echo mine' EXIT; cd /; exit 4")
+    assert result.stdout == "mine\n"
+    assert result.exit_code == 4
+    assert result.state_saved
+
+    assert session.run("pwd").stdout == "/\n"
+
+
+def test_exec_reports_unsaved_state(session):
+    session.run("cd /tmp")
+    result = session.run("cd /; exec true")
+
+    assert result.exit_code == 0
+    assert not result.state_saved
+    assert session.run("pwd").stdout == "/tmp\n"
+
+
+def test_sudo_uses_askpass(session):
+    result = session.run('type sudo | head -1; sh "$SUDO_ASKPASS"')
+
+    assert result.stdout == "sudo is a function\nsecret\n"
+
+
+def test_timeout_sends_sigint(session):
+    result = session.run("sleep 10", timeout=0.5)
+
+    assert result.timed_out
+    assert result.exit_code == -2
+    assert result.duration < 2
+
+
+def test_timeout_escalates_to_sigkill_without_spinning(session):
+    result = session.run("trap '' INT; sleep 10", timeout=0.5)
+
+    assert result.timed_out
+    assert result.exit_code == -9
+    assert result.duration >= 2.5
+
+    # 유예 시간 동안 에이전트가 바쁜 대기로 CPU를 쓰지 않아야 함
+    channel = session.channel
+    session.close()
+    rusage = channel.wait_rusage()
+    assert rusage.ru_utime + rusage.ru_stime < 1.0
+
+
+def test_non_positive_timeout_means_no_limit(session):
+    result = session.run("sleep 0.2; echo done", timeout=0)
+
+    assert result.stdout == "done\n"
+    assert not result.timed_out
+
+
+def test_interrupt_frame(session):
+    session._send_json(b"C", {"command": "sleep 10", "timeout": 30})
+    time.sleep(0.2)
+    session.interrupt()
+
+    while True:
+        frame_type, payload = session._read_frame(time.time() + 5)
+        if frame_type == b"X":
+            break
+    status = json.loads(payload)
+
+    assert status["interrupted"]
+    assert status["exit_code"] == -2
+    assert status["duration"] < 2
+
+
+def test_background_job_survives_command_exit(session, tmp_path):
+    marker = tmp_path / "done"
+    result = session.run(f"(sleep 0.5; echo late; echo late >&2; touch {marker}) &")
+    assert result.exit_code == 0
+
+    # 백그라운드 작업의 출력 파이프가 닫히지 않아 SIGPIPE로 죽지 않아야 함
+    time.sleep(1)
+    assert marker.exists()
+
+
+def test_background_output_drained_while_idle_and_running(session, tmp_path):
+    marker = tmp_path / "done"
+    session.run(f"(for i in $(seq 2000); do seq 100; done; touch {marker}) &")
+
+    # 파이프 버퍼보다 큰 출력도 유휴 상태와 다음 명령 실행 중에 계속 비워짐
+    time.sleep(0.5)
+    result = session.run("sleep 0.5; echo next")
+    time.sleep(0.5)
+
+    assert result.stdout == "next\n"
+    assert marker.exists()
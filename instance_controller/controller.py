@@ -1,4 +1,5 @@
 from datetime import datetime
+import sys
 import time
 import json
 
@@ -18,12 +19,15 @@ class LLMController:
             username=settings.ssh_username,
             password=settings.ssh_password,
         )
-        self.instance = SSHClient(settings.experiment_id, self.ssh_info)
+        self.instance = SSHClient(
+            settings.experiment_id, self.ssh_info, use_agent=settings.ssh_use_agent
+        )
         self.instance.connect()
         self.llm = LLM(settings)
         self.history: list[StepHistory] = []
 
-    def append_history(self, history_item: StepHistory):
+    def append_history(self, history_item: StepHistory, streamed: bool = False):
+        """streamed: 출력이 이미 print_output으로 출력된 경우 미리보기 생략"""
 
         # if len(history_item.output) > 1000:
         #     # 끝-300~끝 range 추가
@@ -33,11 +37,15 @@ class LLMController:
         print(f"[{history_item.timestamp}] {history_item.event.value}")
         if history_item.command:
             print(f"  Command: {history_item.command}")
+        if history_item.exit_code is not None:
+            print(
+                f"  Exit code: {history_item.exit_code} ({history_item.duration:.3f}s)"
+            )
         if history_item.description:
             print(f"  Description: {history_item.description}")
         if history_item.error:
             print(f"  Error: {history_item.error}")
-        if history_item.output:
+        if history_item.output and not streamed:
             output_preview = (
                 history_item.output[:100] + "..."
                 if len(history_item.output) > 100
@@ -46,6 +54,11 @@ class LLMController:
             print(f"  Output: {output_preview}")
         print("-" * 50)
 
+    def print_output(self, stream: str, text: str):
+        """에이전트 모드 명령의 출력을 도착하는 대로 출력"""
+        file = sys.stderr if stream == "stderr" else sys.stdout
+        print(text, end="", file=file, flush=True)
+
     def next_step_from_llm(self):
 
         res = self.llm.generate_response(history=self.history)
@@ -60,19 +73,35 @@ class LLMController:
             if event == "shell_command":
                 command = data.get("command", {}).get("content", "")
                 timeout = data["command"].get("timeout", 30)
-                output, error_msg = self.instance.send_command_to_shell(
-                    command, timeout
-                )
-                self.append_history(
-                    StepHistory(
-                        event=EventType.SHELL_COMMAND,
-                        error=error_msg,
-                        timestamp=datetime.now(),
-                        description=description,
-                        command=command,
-                        output=output,
+                interactive = data["command"].get("interactive", False)
+                if self.instance.agent is not None and not interactive:
+                    print(f"$ {command}")
+                    res = self.instance.execute_command(
+                        command, timeout, on_output=self.print_output
+                    )
+                    res.description = description
+                    self.append_history(res, streamed=True)
+                else:
+                    sync_error = ""
+                    if interactive:
+                        sync_error = self.instance.sync_shell_with_agent()
+                    output, error_msg = self.instance.send_command_to_shell(
+                        command, timeout
+                    )
+                    if sync_error:
+                        error_msg = (
+                            f"{sync_error}; {error_msg}" if error_msg else sync_error
+                        )
+                    self.append_history(
+                        StepHistory(
+                            event=EventType.SHELL_COMMAND,
+                            error=error_msg,
+                            timestamp=datetime.now(),
+                            description=description,
+                            command=command,
+                            output=output,
+                        )
                     )
-                )
 
             elif event == "connect":
                 res = self.instance.connect()
@@ -8,6 +8,9 @@ from instance_controller.prompt import generate_system_prompt
 class CommandFormat(BaseModel):
     content: str = Field(..., description="실행할 bash 명령어")
     timeout: int = Field(30, description="명령어 실행 시간 제한 (초 단위)")
+    interactive: bool = Field(
+        False, description="interactive한 프로그램일 경우 true (PTY 셸에서 실행)"
+    )
 
 
 class ResponseFormat(BaseModel):